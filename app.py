@@ -1,8 +1,30 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, render_template
+from werkzeug.exceptions import HTTPException
 import os
-from flask_cors import CORS, cross_origin
-from cnnClassifier.utils.common import decodeImage
-from cnnClassifier.pipeline.prediction import PredictionPipeline
+import logging
+import sys
+import uuid
+import subprocess
+import queue
+import threading
+try:
+    import pybase64 as b64  # SIMD-accelerated decoder
+except ImportError:
+    import base64 as b64
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+try:
+    from service_streamer import ThreadedStreamer
+    # service_streamer pins its module logger to INFO and logs every batch,
+    # which would flood logs/running_logs.log on the request path
+    logging.getLogger("service_streamer.service_streamer").setLevel(logging.WARNING)
+except ImportError:
+    ThreadedStreamer = None
+from cnnClassifier.utils.common import decodeBase64Stream, validate_image, validate_image_bytes
+from cnnClassifier.pipeline.prediction import PredictionPipeline, MAX_BATCH_SIZE
 import tensorflow as tf
 
 
@@ -18,44 +40,218 @@ if gpus:
     except RuntimeError as e:
         print(f"GPU memory growth error (expected on CPU deployments): {e}")
 
+# Smallest plausible /predict body and the upload size cap
+MIN_PREDICT_BYTES = 120
+MAX_PREDICT_BYTES = 20 * 1024 * 1024
+
 app = Flask(__name__)
-CORS(app)
+app.config['MAX_CONTENT_LENGTH'] = MAX_PREDICT_BYTES
+
+# Static CORS headers added to every response
+_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
 
 
 class ClientApp:
-    def __init__(self):
-        self.filename = "inputImage.jpg"
-        self.classifier = PredictionPipeline(self.filename)
+    def __init__(self, pool_size=2):
+        # ThreadedStreamer runs every batch on a single worker thread, so with
+        # the streamer only one pipeline is ever used. The pool of pipelines
+        # (each holding its own model copy) only pays off without it, when
+        # request threads call predict_batch concurrently.
+        if ThreadedStreamer is not None:
+            pool_size = 1
+
+        self.pool = queue.Queue()
+        for _ in range(pool_size):
+            pipeline = PredictionPipeline()
+            try:
+                pipeline.warmup()
+            except Exception as e:
+                print(f"Model warmup failed, loading lazily on first request: {e}")
+            self.pool.put(pipeline)
+
+        # Coalesce concurrent requests into one batched forward pass
+        if ThreadedStreamer is not None:
+            self.streamer = ThreadedStreamer(
+                self.predict_batch, batch_size=MAX_BATCH_SIZE, max_latency=0.05
+            )
+        else:
+            self.streamer = None
+
+    def predict_batch(self, images):
+        pipeline = self.pool.get()
+        try:
+            return pipeline.predict_batch(images)
+        finally:
+            self.pool.put(pipeline)
+
+    def predict(self, image_data):
+        if self.streamer is not None:
+            return self.streamer.predict([image_data])[0]
+        return self.predict_batch([image_data])[0]
+
+clApp = ClientApp(pool_size=int(os.environ.get("MODEL_POOL_SIZE", 2)))
+
+# index.html is static, so it is rendered once and served from memory
+_HOME_HTML = None
+
+# Latest background training run, keyed by job id
+_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+
+
+def _read_image():
+    """Read the /predict image as raw bytes, routed by Content-Type.
+
+    Accepts a multipart upload with an ``image`` file field, a raw base64
+    ``text/plain`` body, or JSON with a base64 ``image`` field.
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('image')
+        if upload is None:
+            return False, "Missing 'image' file field", None
+        image_data = upload.read()
+    elif request.mimetype == 'text/plain':
+        try:
+            image_data = decodeBase64Stream(request.stream)
+        except ValueError:
+            return False, "Invalid base64 data", None
+    else:
+        payload = request.get_json()
+        if not isinstance(payload, dict) or not isinstance(payload.get('image'), str):
+            return False, "Missing 'image' field", None
+        return validate_image(payload['image'])
+
+    is_valid, message = validate_image_bytes(image_data)
+    return is_valid, message, image_data if is_valid else None
+
+
+def _json(payload, status=200):
+    """Serialize a response body with orjson, falling back to the stdlib."""
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        body = json.dumps(payload)
+    return Response(body, status=status, mimetype='application/json')
 
-clApp = ClientApp()
+
+# Error bodies only differ in the message, so the skeleton is kept as bytes
+_ERR_TMPL = b'{"success":false,"error":%s}'
+
+
+def _err(message, status):
+    """Build an error response from the precomputed JSON skeleton."""
+    if orjson is not None:
+        encoded = orjson.dumps(message)
+    else:
+        encoded = json.dumps(message).encode('utf-8')
+    return Response(_ERR_TMPL % encoded, status=status,
+                    mimetype='application/json', direct_passthrough=True)
+
+
+@app.before_request
+def answer_preflight():
+    if request.method == 'OPTIONS':
+        return Response(status=204)
+
+
+@app.after_request
+def add_cors_headers(response):
+    response.headers.update(_CORS_HEADERS)
+    return response
+
+
+@app.before_request
+def reject_unsupported_predict():
+    if (request.method == 'POST' and request.endpoint == 'predictRoute'
+            and not request.is_json
+            and request.mimetype not in ('multipart/form-data', 'text/plain')):
+        return _err("Unsupported Content-Type", 415)
 
 
 @app.route("/", methods=['GET'])
-@cross_origin()
 def home():
-    return render_template('index.html')
+    global _HOME_HTML
+    if _HOME_HTML is None:
+        _HOME_HTML = render_template('index.html').encode('utf-8')
+    return Response(_HOME_HTML, mimetype='text/html')
 
 
 @app.route("/train", methods=['GET', 'POST'])
-@cross_origin()
 def trainRoute():
-    os.system("python main.py")
-    return "Training done successfully!"
+    # Training runs for a long time; launch it in the background and return
+    # a job id that can be polled via /train/status/<job_id>.
+    # Output goes to logs/running_logs.log through the pipeline logger.
+    with _JOBS_LOCK:
+        # Concurrent runs would overwrite each other's outputs under artifacts/
+        for job_id, process in _JOBS.items():
+            if process.poll() is None:
+                return _err(f"Training job {job_id} is already running", 409)
+
+        process = subprocess.Popen(
+            [sys.executable, "main.py"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        job_id = uuid.uuid4().hex
+        # Only the latest job is tracked; earlier ones have finished
+        _JOBS.clear()
+        _JOBS[job_id] = process
+    return _json({"job_id": job_id, "status": "running"}, 202)
+
+
+@app.route("/train/status/<job_id>", methods=['GET'])
+def trainStatusRoute(job_id):
+    process = _JOBS.get(job_id)
+    if process is None:
+        return _err("Unknown job id", 404)
+
+    returncode = process.poll()
+    if returncode is None:
+        return _json({"job_id": job_id, "status": "running"})
+    return _json({
+        "job_id": job_id,
+        "status": "succeeded" if returncode == 0 else "failed",
+        "returncode": returncode
+    })
 
 
 @app.route("/predict", methods=['POST'])
-@cross_origin()
 def predictRoute():
+    # Reject from the header alone, before the body is buffered and parsed.
+    # Chunked bodies carry no Content-Length; MAX_CONTENT_LENGTH caps those.
+    content_length = request.content_length
+    if content_length is not None:
+        if content_length > MAX_PREDICT_BYTES:
+            return _err("Image is too large", 413)
+        if content_length < MIN_PREDICT_BYTES:
+            return _err("Request body is too small to contain an image", 400)
+
     try:
-        image = request.json['image']
-        decodeImage(image, clApp.filename)
-        result = clApp.classifier.predict()
-        return jsonify(result)
+        is_valid, message, image_data = _read_image()
+        if not is_valid:
+            return _err(message, 400)
+        result = clApp.predict(image_data)
+        if "error" in result:
+            return _err(result["error"], 422)
+        return _json(result)
+    except HTTPException as e:
+        # e.g. 413 from MAX_CONTENT_LENGTH on a chunked body, 400 on bad JSON
+        return _err(e.description, e.code)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _err(str(e), 500)
 
 
 if __name__ == "__main__":
     host = os.environ.get("FLASK_RUN_HOST", "127.0.0.1")
     port = int(os.environ.get("FLASK_RUN_PORT", 8080))
-    app.run(host=host, port=port, debug=False)
\ No newline at end of file
+    if os.environ.get("PROD"):
+        # Multi-threaded WSGI server so concurrent /predict requests can be batched
+        from waitress import serve
+        threads = int(os.environ.get("WAITRESS_THREADS", 16))
+        serve(app, host=host, port=port, threads=threads)
+    else:
+        app.run(host=host, port=port, debug=False)
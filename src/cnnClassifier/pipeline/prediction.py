@@ -2,11 +2,24 @@ import numpy as np
 from tensorflow.keras.models import load_model, Model
 from tensorflow.keras.preprocessing import image
 import os
+from io import BytesIO
+from cnnClassifier import logger
+
+
+IMAGE_SIZE = (224, 224)
+MAX_BATCH_SIZE = 16
+
+
+def _rescale_into(u8_hwc, out_hwc):
+    """Rescale a uint8 HWC image to [0, 1] float32 into a preallocated buffer."""
+    np.divide(u8_hwc, np.float32(255.0), out=out_hwc)
 
 
 class PredictionPipeline:
-    def __init__(self, filename):
+    def __init__(self, filename=None):
         self.filename = filename
+        # Model input buffer, reused across requests
+        self._batch_buffer = np.empty((MAX_BATCH_SIZE, *IMAGE_SIZE, 3), dtype=np.float32)
         self._model = None
         self._feature_extractor = None
         self._feature_mean = None
@@ -44,6 +57,15 @@ class PredictionPipeline:
             self._feature_mean = None
             self._ood_threshold = None
 
+    def warmup(self):
+        """Load the model and run a dummy batch so the first request is not cold."""
+        self._load_model()
+        dummy = self._batch_buffer[:1]
+        _rescale_into(np.zeros((*IMAGE_SIZE, 3), dtype=np.uint8), dummy[0])
+        if self._feature_extractor is not None:
+            self._feature_extractor.predict(dummy, verbose=0)
+        self._model.predict(dummy, verbose=0)
+
     @staticmethod
     def _cosine_distance(a, b):
         dot = np.dot(a, b)
@@ -54,35 +76,86 @@ class PredictionPipeline:
         return 1.0 - (dot / (norm_a * norm_b))
 
     def predict(self):
+        if self.filename is None:
+            raise ValueError("PredictionPipeline.predict() needs a filename; use predict_batch() for in-memory images")
+        test_image = image.load_img(self.filename, target_size=IMAGE_SIZE)
+        return self._classify([test_image])[0]
+
+    def predict_batch(self, images):
+        """Predict a list of raw image bytes with one forward pass.
+
+        Never raises: an image that cannot be decoded, or a batch whose
+        forward pass fails, gets an ``{"error": ...}`` dict in its slot so
+        one bad upload cannot fail the other requests batched with it.
+        """
+        results = [None] * len(images)
+        test_images, indices = [], []
+        for i, data in enumerate(images):
+            try:
+                test_images.append(self._load_bytes(data))
+                indices.append(i)
+            except Exception:
+                logger.exception("Could not decode image %d of batch", i)
+                results[i] = {"error": "Uploaded file could not be decoded as an image"}
+
+        if test_images:
+            try:
+                for i, result in zip(indices, self._classify(test_images)):
+                    results[i] = result
+            except Exception:
+                logger.exception("Prediction failed for a batch of %d images", len(indices))
+                for i in indices:
+                    results[i] = {"error": "Prediction failed"}
+        return results
+
+    @staticmethod
+    def _load_bytes(data):
+        with BytesIO(data) as buf:
+            img = image.load_img(buf, target_size=IMAGE_SIZE)
+            # load_img skips decoding when no resize/convert is needed, so
+            # force it while the buffer is still open
+            img.load()
+        return img
+
+    def _classify(self, test_images):
         self._load_model()
 
-        # Preprocess image
-        test_image = image.load_img(self.filename, target_size=(224, 224))
-        test_image = image.img_to_array(test_image) / 255.0
-        test_image = np.expand_dims(test_image, axis=0)
+        # Preprocess images straight into the preallocated batch buffer
+        n = len(test_images)
+        if n > len(self._batch_buffer):
+            self._batch_buffer = np.empty((n, *IMAGE_SIZE, 3), dtype=np.float32)
+        batch = self._batch_buffer[:n]
+        for img, out in zip(test_images, batch):
+            _rescale_into(np.asarray(img, dtype=np.uint8), out)
+        results = [None] * n
 
         # --- OOD check ---
         if self._feature_mean is not None and self._ood_threshold is not None:
-            features = self._feature_extractor.predict(test_image, verbose=0)[0]
-            distance = self._cosine_distance(features, self._feature_mean)
-
-            if distance > self._ood_threshold:
-                return {
-                    "prediction": "Invalid",
-                    "confidence": 0,
-                    "message": "This image does not appear to be a kidney CT scan.",
-                    "distance": round(float(distance), 6),
-                    "threshold": round(self._ood_threshold, 6)
-                }
+            features = self._feature_extractor.predict(batch, verbose=0)
+            for i, feature in enumerate(features):
+                distance = self._cosine_distance(feature, self._feature_mean)
+                if distance > self._ood_threshold:
+                    results[i] = {
+                        "prediction": "Invalid",
+                        "confidence": 0,
+                        "message": "This image does not appear to be a kidney CT scan.",
+                        "distance": round(float(distance), 6),
+                        "threshold": round(self._ood_threshold, 6)
+                    }
 
         # --- Classification ---
-        result = self._model.predict(test_image, verbose=0)
-        confidence = float(np.max(result))
-        predicted_class = np.argmax(result, axis=1)[0]
-
-        prediction = 'Tumor' if predicted_class == 1 else 'Normal'
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending:
+            scores = self._model.predict(batch[pending], verbose=0)
+            for i, result in zip(pending, scores):
+                confidence = float(np.max(result))
+                predicted_class = np.argmax(result)
+
+                prediction = 'Tumor' if predicted_class == 1 else 'Normal'
+
+                results[i] = {
+                    "prediction": prediction,
+                    "confidence": round(confidence * 100, 2)
+                }
 
-        return {
-            "prediction": prediction,
-            "confidence": round(confidence * 100, 2)
-        }
\ No newline at end of file
+        return results
@@ -9,6 +9,12 @@ from box import ConfigBox
 from pathlib import Path
 from typing import Any
 import base64
+from io import BytesIO
+from PIL import Image
+try:
+    import pybase64 as b64
+except ImportError:
+    b64 = base64
 
 
 
@@ -126,12 +132,128 @@ def get_size(path: Path) -> str:
 
 
 def decodeImage(imgstring, fileName):
-    imgdata = base64.b64decode(imgstring)
+    imgdata = b64.b64decode(imgstring, validate=False)
     with open(fileName, 'wb') as f:
         f.write(imgdata)
         f.close()
 
 
+# Leading bytes of the image formats the frontend can send
+_IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",         # JPEG
+    b"\x89PNG\r\n\x1a\n",   # PNG
+    b"GIF87a",
+    b"GIF89a",
+)
+
+
+def validate_image(base64_string):
+    """decode a base64 image payload and check that it holds an image
+
+    The decoded bytes are returned alongside the verdict so callers do
+    not decode the payload a second time.
+
+    Args:
+        base64_string (str): base64 data, optionally with a data URL prefix
+
+    Returns:
+        tuple: (is_valid, message, image bytes or None)
+    """
+    # Strip a data URL prefix; the comma is searched for only in the header
+    if base64_string.startswith("data:"):
+        idx = base64_string.find(",", 0, 128)
+        if idx != -1:
+            base64_string = base64_string[idx + 1:]
+
+    # Restore stripped '=' padding; the length check is a cheap bitmask and
+    # the string is only copied when padding is actually missing
+    padding = -len(base64_string) & 3
+    if padding:
+        base64_string += "=" * padding
+
+    try:
+        image_data = b64.b64decode(base64_string, validate=False)
+    except ValueError:
+        return False, "Invalid base64 data", None
+
+    is_valid, message = validate_image_bytes(image_data)
+    return is_valid, message, image_data if is_valid else None
+
+
+def validate_image_bytes(image_data):
+    """check that raw bytes hold an image
+
+    Only the leading bytes are sniffed against known magic numbers; a PIL
+    parse is done only when no signature matches.
+
+    Args:
+        image_data (bytes): raw image bytes
+
+    Returns:
+        tuple: (is_valid, message)
+    """
+    if image_data.startswith(_IMAGE_SIGNATURES):
+        return True, "Valid image"
+    if image_data[:4] == b"RIFF" and image_data[8:12] == b"WEBP":
+        return True, "Valid image"
+
+    # verify() checks the stream without allocating a pixel buffer
+    try:
+        Image.open(BytesIO(image_data)).verify()
+    except Exception:
+        return False, "Uploaded file is not a valid image"
+    return True, "Valid image"
+
+
+# Whitespace is dropped from streamed base64; any other non-alphabet byte is rejected
+_BASE64_WHITESPACE = b" \t\r\n\x0b\x0c"
+
+
+def decodeBase64Stream(stream, chunk_size=65536):
+    """decode a raw base64 body from a file-like stream chunk by chunk
+
+    Args:
+        stream: readable binary stream, e.g. a WSGI request stream
+        chunk_size (int, optional): bytes read per call. Defaults to 65536.
+
+    Raises:
+        ValueError: if the body is not valid base64
+
+    Returns:
+        bytearray: decoded bytes
+    """
+    # Buffer the head so a data URL prefix is stripped even when it spans reads
+    head = b""
+    while len(head) < 128 and b"," not in head:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        head += chunk
+    if head.startswith(b"data:"):
+        idx = head.find(b",", 0, 128)
+        if idx == -1:
+            raise ValueError("Invalid data URL prefix")
+        head = head[idx + 1:]
+
+    # Decode in 4-byte aligned blocks, carrying the remainder to the next read
+    imgdata = bytearray()
+    carry = b""
+    chunk = head
+    while True:
+        chunk = carry + chunk.translate(None, _BASE64_WHITESPACE)
+        aligned = len(chunk) & ~3
+        imgdata += b64.b64decode(chunk[:aligned], validate=True)
+        carry = chunk[aligned:]
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+
+    if carry:
+        carry += b"=" * (-len(carry) & 3)
+        imgdata += b64.b64decode(carry, validate=True)
+    return imgdata
+
+
 def encodeImageIntoBase64(croppedImagePath):
     with open(croppedImagePath, "rb") as f:
         return base64.b64encode(f.read())
\ No newline at end of file
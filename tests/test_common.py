@@ -0,0 +1,95 @@
+import base64
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from cnnClassifier.utils import common
+from cnnClassifier.utils.common import decodeBase64Stream, validate_image
+
+
+PAYLOAD = os.urandom(3 * 1000 + 2)
+ENCODED = base64.b64encode(PAYLOAD)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 7, 64, 65536])
+def test_decode_across_chunk_boundaries(chunk_size):
+    stream = io.BytesIO(ENCODED)
+    assert decodeBase64Stream(stream, chunk_size) == PAYLOAD
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 20, 65536])
+def test_strips_data_url_prefix_split_across_reads(chunk_size):
+    stream = io.BytesIO(b"data:image/jpeg;base64," + ENCODED)
+    assert decodeBase64Stream(stream, chunk_size) == PAYLOAD
+
+
+def test_data_prefix_without_comma_is_rejected():
+    with pytest.raises(ValueError):
+        decodeBase64Stream(io.BytesIO(b"data:" + b"A" * 200))
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4, 5])
+def test_missing_padding_is_restored(size):
+    data = PAYLOAD[:size]
+    stream = io.BytesIO(base64.b64encode(data).rstrip(b"="))
+    assert decodeBase64Stream(stream, 3) == data
+
+
+def test_whitespace_is_ignored():
+    stream = io.BytesIO(base64.encodebytes(PAYLOAD).replace(b"\n", b"\r\n"))
+    assert decodeBase64Stream(stream, 7) == PAYLOAD
+
+
+def test_non_alphabet_bytes_are_rejected():
+    corrupted = ENCODED[:10] + b"!" + ENCODED[10:]
+    with pytest.raises(ValueError):
+        decodeBase64Stream(io.BytesIO(corrupted), 8)
+
+
+def _encode_image(fmt):
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8), (120, 30, 200)).save(buf, fmt)
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def test_validate_image_returns_decoded_bytes():
+    encoded = _encode_image("JPEG")
+    is_valid, _, image_data = validate_image(encoded)
+    assert is_valid
+    assert image_data == base64.b64decode(encoded)
+
+
+def test_validate_image_strips_data_url_prefix():
+    encoded = _encode_image("PNG")
+    is_valid, _, image_data = validate_image("data:image/png;base64," + encoded)
+    assert is_valid
+    assert image_data == base64.b64decode(encoded)
+
+
+def test_validate_image_restores_missing_padding():
+    encoded = _encode_image("PNG")
+    assert encoded.endswith("=")
+    is_valid, _, image_data = validate_image(encoded.rstrip("="))
+    assert is_valid
+    assert image_data == base64.b64decode(encoded)
+
+
+def test_validate_image_known_signature_skips_pil(monkeypatch):
+    def fail_open(*args, **kwargs):
+        raise AssertionError("PIL fallback should not run for a known signature")
+
+    monkeypatch.setattr(common.Image, "open", fail_open)
+    assert validate_image(_encode_image("JPEG"))[0]
+
+
+def test_validate_image_unknown_signature_uses_pil_fallback():
+    is_valid, _, image_data = validate_image(_encode_image("BMP"))
+    assert is_valid
+    assert image_data.startswith(b"BM")
+
+
+def test_validate_image_rejects_non_image():
+    encoded = base64.b64encode(b"definitely not an image").decode()
+    assert validate_image(encoded) == (False, "Uploaded file is not a valid image", None)
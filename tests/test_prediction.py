@@ -0,0 +1,93 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from cnnClassifier.pipeline.prediction import PredictionPipeline
+
+
+class FakeClassifier:
+    """Scores each image by its mean brightness: bright is 'Tumor'."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, batch, verbose=0):
+        self.batches.append(np.array(batch))
+        brightness = batch.mean(axis=(1, 2, 3))
+        return np.stack([1 - brightness, brightness], axis=1)
+
+
+class FakeFeatureExtractor:
+    """Uses per-channel means as features, so grey images sit on the reference."""
+
+    def predict(self, batch, verbose=0):
+        return batch.mean(axis=(1, 2))
+
+
+class FailingModel:
+    def predict(self, batch, verbose=0):
+        raise RuntimeError("device lost at 0x7f00")
+
+
+def _image_bytes(color, fmt="PNG", size=(224, 224)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, fmt)
+    return buf.getvalue()
+
+
+BRIGHT = _image_bytes((200, 200, 200))
+DARK = _image_bytes((40, 40, 40))
+RED = _image_bytes((255, 0, 0))
+
+
+@pytest.fixture
+def pipeline():
+    pipe = PredictionPipeline()
+    pipe._model = FakeClassifier()
+    pipe._feature_extractor = FakeFeatureExtractor()
+    return pipe
+
+
+def test_bad_image_does_not_fail_the_batch(pipeline):
+    results = pipeline.predict_batch([BRIGHT, b"not an image", DARK])
+
+    assert results[0]["prediction"] == "Tumor"
+    assert results[1] == {"error": "Uploaded file could not be decoded as an image"}
+    assert results[2]["prediction"] == "Normal"
+
+
+def test_unresized_rgb_jpeg_is_decoded(pipeline):
+    # 224x224 RGB needs no resize, so load_img hands back a lazily-loaded image
+    results = pipeline.predict_batch([_image_bytes((200, 200, 200), fmt="JPEG")])
+
+    assert results[0]["prediction"] == "Tumor"
+
+
+def test_ood_results_map_back_to_their_index(pipeline):
+    pipeline._feature_mean = np.ones(3, dtype=np.float32)
+    pipeline._ood_threshold = 0.1
+
+    results = pipeline.predict_batch([BRIGHT, RED, DARK])
+
+    assert [r["prediction"] for r in results] == ["Tumor", "Invalid", "Normal"]
+    # Only the in-distribution images reach the classifier
+    assert len(pipeline._model.batches) == 1
+    assert len(pipeline._model.batches[0]) == 2
+
+
+def test_forward_pass_failure_returns_errors(pipeline):
+    pipeline._model = FailingModel()
+
+    results = pipeline.predict_batch([BRIGHT, b"not an image"])
+
+    assert results == [
+        {"error": "Prediction failed"},
+        {"error": "Uploaded file could not be decoded as an image"},
+    ]
+
+
+def test_predict_without_filename_raises():
+    with pytest.raises(ValueError):
+        PredictionPipeline().predict()